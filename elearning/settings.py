@@ -126,6 +126,27 @@ elif 'POSTGRES_URL' in os.environ:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Per-process memory cache by default. Deletes only reach the process that made them, so
+# set REDIS_URL wherever more than one worker or serverless instance serves requests
+# (e.g. the Vercel deployment) to make cache invalidation apply everywhere
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -198,6 +219,9 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10
 }
 
+# Batch size used for bulk inserts/updates of child rows (choices, answers)
+BULK_CREATE_BATCH_SIZE = int(os.environ.get('BULK_CREATE_BATCH_SIZE', 100))
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-15 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0003_alter_choice_choice_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', 'student'], name='ea_exam_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', 'is_completed', 'score'], name='ea_exam_completed_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['exam', 'order'], name='question_exam_order_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-15 18:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_question_count(apps, schema_editor):
+    Exam = apps.get_model('exams', 'Exam')
+    Question = apps.get_model('exams', 'Question')
+    question_count = Subquery(
+        Question.objects.filter(exam=OuterRef('pk')).order_by()
+        .values('exam').annotate(count=Count('pk')).values('count')
+    )
+    Exam.objects.update(question_count=Coalesce(question_count, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0004_exam_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_question_count, migrations.RunPython.noop),
+    ]
@@ -12,6 +12,8 @@ class Exam(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     is_published = models.BooleanField(default=False)
+    # Denormalized number of questions, kept in sync by exams.signals
+    question_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -34,6 +36,16 @@ class Question(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['exam', 'order'], name='question_exam_order_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets exams.signals spot a move to another exam without re-reading the row
+        instance._loaded_exam_id = instance.__dict__.get('exam_id')
+        return instance
     
     def __str__(self):
         return f"{self.exam.title} - Question {self.order}"
@@ -54,6 +66,13 @@ class ExamAttempt(models.Model):
     score = models.PositiveIntegerField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['exam', 'student'], name='ea_exam_student_idx'),
+            # Covers the analytics aggregate, so it can be answered from the index alone
+            models.Index(fields=['exam', 'is_completed', 'score'], name='ea_exam_completed_score_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.student.username} - {self.exam.title}"
 
@@ -1,21 +1,56 @@
+import copy
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 from .models import Exam, Question, Choice, ExamAttempt, Answer
 from courses.serializers import CourseSerializer
 
-class ChoiceSerializer(serializers.ModelSerializer):
+class CachedFieldsSerializerMixin:
+    # Builds fields once per class; only for serializers whose fields don't depend on context
+    _fields_cache_lock = threading.Lock()
+
+    def get_fields(self):
+        cls = type(self)
+        fields = cls.__dict__.get('_cached_fields')
+        if fields is None:
+            with self._fields_cache_lock:
+                fields = cls.__dict__.get('_cached_fields')
+                if fields is None:
+                    fields = super().get_fields()
+                    cls._cached_fields = fields
+        return {
+            name: copy.deepcopy(field) if isinstance(field, serializers.BaseSerializer)
+            else field.__class__(*field._args, **field._kwargs)
+            for name, field in fields.items()
+        }
+
+class ChoiceSerializer(CachedFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Choice
         fields = ('id', 'choice_text', 'is_correct')
+        read_only_fields = fields
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(CachedFieldsSerializerMixin, serializers.ModelSerializer):
     choices = ChoiceSerializer(many=True, read_only=True)
     
     class Meta:
         model = Question
         fields = ('id', 'question_text', 'question_type', 'marks', 'order', 'choices')
+        read_only_fields = fields
+
+class ChoiceCreateSerializer(serializers.ModelSerializer):
+    # Writable so that updates can match submitted choices to existing rows
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Choice
+        fields = ('id', 'choice_text', 'is_correct')
 
 class QuestionCreateSerializer(serializers.ModelSerializer):
-    choices = ChoiceSerializer(many=True)
+    choices = ChoiceCreateSerializer(many=True)
     
     class Meta:
         model = Question
@@ -23,46 +58,86 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         choices_data = validated_data.pop('choices')
-        question = Question.objects.create(**validated_data)
-        for choice_data in choices_data:
-            Choice.objects.create(question=question, **choice_data)
+        with transaction.atomic():
+            question = Question.objects.create(**validated_data)
+            choices = []
+            for choice_data in choices_data:
+                choice_data.pop('id', None)
+                choices.append(Choice(question=question, **choice_data))
+            Choice.objects.bulk_create(choices, batch_size=settings.BULK_CREATE_BATCH_SIZE)
         return question
 
     def update(self, instance, validated_data):
         choices_data = validated_data.pop('choices', None)
-        # Update the question fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        if choices_data is not None:
-            # Remove choices not present in the update
-            existing_ids = [c.get('id') for c in choices_data if c.get('id')]
-            for choice in instance.choices.all():
-                if choice.id not in existing_ids:
-                    choice.delete()
-
-            # Update or create choices
-            for choice_data in choices_data:
-                choice_id = choice_data.get('id', None)
-                if choice_id:
-                    # Update existing choice
-                    choice = Choice.objects.get(id=choice_id, question=instance)
-                    choice.choice_text = choice_data.get('choice_text', choice.choice_text)
-                    choice.is_correct = choice_data.get('is_correct', choice.is_correct)
-                    choice.save()
-                else:
-                    # Create new choice
-                    Choice.objects.create(question=instance, **choice_data)
+        with transaction.atomic():
+            if choices_data is not None:
+                existing = {choice.id: choice for choice in instance.choices.all()}
+                unknown_ids = {c['id'] for c in choices_data if c.get('id') is not None} - existing.keys()
+                if unknown_ids:
+                    raise serializers.ValidationError(
+                        {'choices': f"Choices {sorted(unknown_ids)} do not belong to this question."}
+                    )
+                keep_ids = {c['id'] for c in choices_data if c.get('id') is not None}
+
+            # Update the question fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            if choices_data is not None:
+                # Remove choices not present in the update
+                instance.choices.exclude(id__in=keep_ids).delete()
+
+                # Partition into updates of existing choices and new choices
+                to_update, to_create = [], []
+                for choice_data in choices_data:
+                    choice_id = choice_data.pop('id', None)
+                    if choice_id is not None:
+                        choice = existing[choice_id]
+                        choice.choice_text = choice_data.get('choice_text', choice.choice_text)
+                        choice.is_correct = choice_data.get('is_correct', choice.is_correct)
+                        to_update.append(choice)
+                    else:
+                        to_create.append(Choice(question=instance, **choice_data))
+
+                Choice.objects.bulk_update(to_update, ['choice_text', 'is_correct'],
+                                           batch_size=settings.BULK_CREATE_BATCH_SIZE)
+                Choice.objects.bulk_create(to_create, batch_size=settings.BULK_CREATE_BATCH_SIZE)
         return instance
 
-class ExamSerializer(serializers.ModelSerializer):
+class ExamSerializer(CachedFieldsSerializerMixin, serializers.ModelSerializer):
     course = CourseSerializer(read_only=True)
     questions = QuestionSerializer(many=True, read_only=True)
     
     class Meta:
         model = Exam
-        fields = '__all__'
+        fields = ('id', 'course', 'questions', 'title', 'description', 'duration',
+                 'total_marks', 'passing_marks', 'start_time', 'end_time',
+                 'is_published', 'created_at', 'updated_at')
+        read_only_fields = fields
+
+class ExamListSerializer(CachedFieldsSerializerMixin, serializers.ModelSerializer):
+    # Thin list shape; the list querysets load only these columns
+    class Meta:
+        model = Exam
+        fields = ('id', 'course', 'title', 'duration', 'start_time', 'end_time',
+                 'is_published', 'question_count')
+        read_only_fields = fields
+
+# Everything ExamSerializer renders; exams.tests checks that rendering after these runs no queries
+def exam_related_lookups(prefix=''):
+    return [
+        f'{prefix}course__instructor',
+        f'{prefix}course__students',
+        f'{prefix}course__ratings',
+        f'{prefix}course__modules__lessons',
+        Prefetch(f'{prefix}questions', queryset=Question.objects.prefetch_related('choices')),
+    ]
+
+# Prefetches what ExamSerializer renders onto already-fetched exams
+def attach_exam_related(exams):
+    prefetch_related_objects(list(exams), *exam_related_lookups())
+    return exams
 
 class ExamCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -76,10 +151,15 @@ class StaffExamCreateSerializer(serializers.ModelSerializer):
         fields = ('title', 'description', 'duration', 'total_marks', 'passing_marks',
                  'start_time', 'end_time', 'is_published')
 
-class AnswerSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Answer
-        fields = ('question', 'answer_text')
+class AnswerSerializer(serializers.Serializer):
+    question = serializers.IntegerField(source='question_id', read_only=True)
+    answer_text = serializers.CharField(read_only=True)
+
+class AnswerCreateSerializer(serializers.Serializer):
+    # Plain id instead of a related field so submissions don't fetch each question;
+    # ExamSubmissionSerializer.validate checks the ids against the exam.
+    question = serializers.IntegerField(source='question_id')
+    answer_text = serializers.CharField()
 
 class ExamAttemptSerializer(serializers.ModelSerializer):
     exam = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -92,15 +172,15 @@ class ExamAttemptSerializer(serializers.ModelSerializer):
         read_only_fields = ('student', 'score', 'is_completed')
 
 class ExamSubmissionSerializer(serializers.Serializer):
-    answers = AnswerSerializer(many=True)
+    answers = AnswerCreateSerializer(many=True)
     
     def validate(self, data):
         attempt = self.context['attempt']
         exam = attempt.exam
         
         # Validate that all questions are answered
-        answered_questions = set(answer['question'].id for answer in data['answers'])
-        exam_questions = set(question.id for question in exam.questions.all())
+        answered_questions = {answer['question_id'] for answer in data['answers']}
+        exam_questions = set(exam.questions.values_list('id', flat=True))
         
         if answered_questions != exam_questions:
             raise serializers.ValidationError("All questions must be answered.")
@@ -110,15 +190,22 @@ class ExamSubmissionSerializer(serializers.Serializer):
     def create(self, validated_data):
         attempt = self.context['attempt']
         answers_data = validated_data['answers']
-        # Remove previous answers for this attempt (if any)
-        attempt.answers.all().delete()
-        # Create new answers
-        for answer_data in answers_data:
-            Answer.objects.create(
-                attempt=attempt,
-                question=answer_data['question'],
-                answer_text=answer_data['answer_text']
+        # Joins the submitting view's transaction instead of adding a savepoint
+        with transaction.atomic(savepoint=False):
+            # Remove previous answers for this attempt (if any)
+            attempt.answers.all().delete()
+            # Create new answers
+            Answer.objects.bulk_create(
+                [
+                    Answer(
+                        attempt=attempt,
+                        question_id=answer_data['question_id'],
+                        answer_text=answer_data['answer_text']
+                    )
+                    for answer_data in answers_data
+                ],
+                batch_size=settings.BULK_CREATE_BATCH_SIZE,
             )
-        attempt.is_completed = True
-        attempt.save()
-        return attempt
\ No newline at end of file
+            attempt.is_completed = True
+            attempt.save()
+        return attempt
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Exam, ExamAttempt, Question
+
+
+def exam_analytics_cache_key(exam_id):
+    return f'exam_analytics:{exam_id}'
+
+
+def _clear_analytics(*exam_ids):
+    cache.delete_many([exam_analytics_cache_key(exam_id) for exam_id in exam_ids])
+
+
+def _on_commit_per_delete(origin, callback, exam_id):
+    # Collects the exam ids touched by one delete(), however far it cascades, into a
+    # single callback run after commit
+    if origin is None:
+        transaction.on_commit(lambda: callback(exam_id))
+        return
+    pending = origin.__dict__.setdefault('_exam_ids_on_commit', {})
+    if callback not in pending:
+        exam_ids = pending[callback] = set()
+
+        def run():
+            del pending[callback]
+            callback(*exam_ids)
+
+        transaction.on_commit(run)
+    pending[callback].add(exam_id)
+
+
+@receiver(post_save, sender=ExamAttempt)
+def invalidate_analytics_for_attempt(sender, instance, **kwargs):
+    # After commit, so a concurrent read can't re-cache the pre-commit numbers
+    transaction.on_commit(lambda: _clear_analytics(instance.exam_id))
+
+
+@receiver(post_save, sender=Exam)
+def invalidate_analytics_for_exam(sender, instance, **kwargs):
+    # passing_marks feeds the passing rate
+    transaction.on_commit(lambda: _clear_analytics(instance.pk))
+
+
+@receiver(post_delete, sender=ExamAttempt)
+@receiver(post_delete, sender=Exam)
+def invalidate_analytics_on_delete(sender, instance, origin=None, **kwargs):
+    exam_id = instance.pk if sender is Exam else instance.exam_id
+    _on_commit_per_delete(origin, _clear_analytics, exam_id)
+
+
+def update_question_count(*exam_ids):
+    # Recount instead of +1/-1 so the column can't drift (e.g. after bulk imports)
+    question_count = Subquery(
+        Question.objects.filter(exam=OuterRef('pk')).order_by()
+        .values('exam').annotate(count=Count('pk')).values('count')
+    )
+    Exam.objects.filter(pk__in=exam_ids).update(question_count=Coalesce(question_count, 0))
+
+
+@receiver(post_save, sender=Question)
+def update_question_count_on_save(sender, instance, created, update_fields=None, **kwargs):
+    # A question moved to another exam also changes the old exam's count
+    if not created and update_fields is not None and not {'exam', 'exam_id'} & update_fields:
+        return
+    previous_exam_id = getattr(instance, '_loaded_exam_id', None)
+    if created or previous_exam_id not in (None, instance.exam_id):
+        update_question_count(*{instance.exam_id, previous_exam_id} - {None})
+    instance._loaded_exam_id = instance.exam_id
+
+
+@receiver(post_delete, sender=Question)
+def update_question_count_on_delete(sender, instance, origin=None, **kwargs):
+    # One recount per delete(); exams removed by the same cascade no longer match it
+    _on_commit_per_delete(origin, update_question_count, instance.exam_id)
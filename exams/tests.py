@@ -1,3 +1,108 @@
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from courses.models import Course, CourseEnrollment, Lesson, Module
+from users.models import User
+from .models import Choice, Exam, Question
+from .serializers import ExamSerializer, attach_exam_related
+
+
+class QuestionCountTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', user_type='teacher')
+        self.course = Course.objects.create(title='Course', description='', instructor=self.teacher)
+        self.exam = self.create_exam()
+        self.other_exam = self.create_exam()
+
+    def create_exam(self):
+        now = timezone.now()
+        return Exam.objects.create(
+            course=self.course, title='Exam', description='', duration=timedelta(hours=1),
+            total_marks=10, passing_marks=5, start_time=now, end_time=now,
+        )
+
+    def create_question(self, exam):
+        return Question.objects.create(exam=exam, question_text='Q', question_type='essay', marks=1)
+
+    def assertQuestionCounts(self, *expected):
+        counts = [Exam.objects.get(pk=exam.pk).question_count for exam in (self.exam, self.other_exam)]
+        self.assertEqual(counts, list(expected))
+
+    def test_create_counts_question(self):
+        self.create_question(self.exam)
+        self.create_question(self.exam)
+        self.assertQuestionCounts(2, 0)
+
+    def test_move_recounts_both_exams(self):
+        question = self.create_question(self.exam)
+        moves = [
+            (self.other_exam, ['exam_id'], (0, 1)),
+            (self.exam, ['exam'], (1, 0)),
+            (self.other_exam, None, (0, 1)),
+        ]
+        for exam, update_fields, expected in moves:
+            with self.subTest(update_fields=update_fields):
+                question = Question.objects.get(pk=question.pk)
+                question.exam = exam
+                question.save(update_fields=update_fields)
+                self.assertQuestionCounts(*expected)
+
+    def test_save_without_exam_skips_recount(self):
+        question = self.create_question(self.exam)
+        question = Question.objects.get(pk=question.pk)
+        question.marks = 5
+        with CaptureQueriesContext(connection) as queries:
+            question.save(update_fields=['marks'])
+        self.assertEqual(len(queries), 1)
+
+    def test_delete_recounts_once(self):
+        question = self.create_question(self.exam)
+        self.create_question(self.exam)
+        self.create_question(self.other_exam)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            question.delete()
+        self.assertEqual(len(callbacks), 1)
+        self.assertQuestionCounts(1, 1)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Question.objects.all().delete()
+        self.assertEqual(len(callbacks), 1)
+        self.assertQuestionCounts(0, 0)
+
+    def test_cascade_delete_recounts_once(self):
+        for _ in range(3):
+            self.create_question(self.exam)
+            self.create_question(self.other_exam)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.course.delete()
+        # One recount, plus one analytics cache clear
+        self.assertEqual(len(callbacks), 2)
+        self.assertFalse(Exam.objects.exists())
+
+
+class AttachExamRelatedTests(TestCase):
+    def test_exam_serializer_renders_without_queries(self):
+        teacher = User.objects.create(username='teacher', user_type='teacher')
+        student = User.objects.create(username='student', user_type='student')
+        course = Course.objects.create(title='Course', description='', instructor=teacher)
+        CourseEnrollment.objects.create(student=student, course=course)
+        module = Module.objects.create(course=course, title='Module', description='', order=1)
+        Lesson.objects.create(module=module, title='Lesson', content='', order=1)
+        now = timezone.now()
+        for _ in range(2):
+            exam = Exam.objects.create(
+                course=course, title='Exam', description='', duration=timedelta(hours=1),
+                total_marks=10, passing_marks=5, start_time=now, end_time=now,
+            )
+            question = Question.objects.create(exam=exam, question_text='Q', question_type='essay', marks=1)
+            Choice.objects.create(question=question, choice_text='A')
 
-# Create your tests here.
+        # Fails when ExamSerializer or a serializer it nests renders a relation that
+        # exam_related_lookups() doesn't load
+        exams = attach_exam_related(list(Exam.objects.all()))
+        with self.assertNumQueries(0):
+            ExamSerializer(exams, many=True).data
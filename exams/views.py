@@ -3,23 +3,42 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
+from django.core.cache import cache
+from django.db import transaction
 from .models import Exam, Question, ExamAttempt, Answer
+from .signals import exam_analytics_cache_key
 from .serializers import (
-    ExamSerializer, ExamCreateSerializer,
+    ExamSerializer, ExamListSerializer, ExamCreateSerializer,
     QuestionSerializer, QuestionCreateSerializer,
     ExamAttemptSerializer, ExamSubmissionSerializer,
-    StaffExamCreateSerializer
+    StaffExamCreateSerializer, attach_exam_related
 )
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework.views import APIView
-from courses.models import Course
-from django.db.models import Avg, Count
+from courses.models import Course, CourseEnrollment
+from django.db.models import Avg, Count, Exists, OuterRef, Q
 
 # Create your views here.
 
+class AttachExamRelatedMixin:
+    def get_serializer(self, *args, **kwargs):
+        if args and 'data' not in kwargs and self.get_serializer_class() is ExamSerializer:
+            attach_exam_related(args[0] if kwargs.get('many') else [args[0]])
+        return super().get_serializer(*args, **kwargs)
+
+class TeacherOwnedExamMixin:
+    def get_exam_queryset(self):
+        # Ownership is checked in the query, so other teachers' exams are simply not found
+        return Exam.objects.filter(course__instructor=self.request.user)
+
+    def get_object(self):
+        exam = get_object_or_404(self.get_exam_queryset(), pk=self.kwargs['pk'])
+        self.check_object_permissions(self.request, exam)
+        return exam
+
 class ExamListView(generics.ListCreateAPIView):
-    serializer_class = ExamSerializer
+    serializer_class = ExamListSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
@@ -31,16 +50,20 @@ class ExamListView(generics.ListCreateAPIView):
             return Exam.objects.none()
         if hasattr(user, 'user_type'):
             if user.user_type == 'teacher':
-                return Exam.objects.filter(course__instructor=user)
+                queryset = Exam.objects.filter(course__instructor=user)
             elif user.user_type == 'student':
                 # Only exams for courses the student is enrolled in
-                return Exam.objects.filter(course__students=user)
+                queryset = Exam.objects.filter(course__students=user).distinct()
+            else:
+                return Exam.objects.none()
+            # Stable ordering so paginated pages don't overlap or skip exams
+            return queryset.only(*ExamListSerializer.Meta.fields).order_by('pk')
         return Exam.objects.none()
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ExamCreateSerializer
-        return ExamSerializer
+        return ExamListSerializer
     
     def perform_create(self, serializer):
         course = serializer.validated_data['course']
@@ -48,7 +71,7 @@ class ExamListView(generics.ListCreateAPIView):
             raise permissions.PermissionDenied("Only the course instructor can create exams.")
         serializer.save()
 
-class ExamDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ExamDetailView(AttachExamRelatedMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Exam.objects.all()
     serializer_class = ExamSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -64,10 +87,12 @@ class ExamDetailView(generics.RetrieveUpdateDestroyAPIView):
             
         user = self.request.user
         if user.user_type == 'teacher':
-            return Exam.objects.filter(course__instructor=user)
+            queryset = Exam.objects.filter(course__instructor=user)
         elif user.user_type == 'student':
-            return Exam.objects.filter(course__students=user)
-        return Exam.objects.none()
+            queryset = Exam.objects.filter(course__students=user).distinct()
+        else:
+            return Exam.objects.none()
+        return queryset.select_related('course__instructor')
 
 class ExamCreateView(generics.CreateAPIView):
     serializer_class = ExamCreateSerializer
@@ -100,7 +125,7 @@ class QuestionListView(generics.ListCreateAPIView):
             return Question.objects.none()
         # Handle both 'pk' and 'exam_id' URL parameters
         exam_id = self.kwargs.get('pk') or self.kwargs.get('exam_id')
-        return Question.objects.filter(exam_id=exam_id)
+        return Question.objects.filter(exam_id=exam_id).order_by('order', 'pk')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -130,11 +155,15 @@ class ExamAttemptView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def perform_create(self, serializer):
-        exam = Exam.objects.get(id=self.kwargs['pk'])
-        if exam.course.students.filter(id=self.request.user.id).exists():
-            serializer.save(student=self.request.user, exam=exam)  # Pass exam here
-        else:
-            raise permissions.PermissionDenied("You are not enrolled in this course.")
+        # Fetch the exam and the enrollment check in a single query
+        enrollment = CourseEnrollment.objects.filter(course=OuterRef('course'), student=self.request.user)
+        exam = get_object_or_404(
+            Exam.objects.annotate(is_enrolled=Exists(enrollment)).only('id', 'course_id'),
+            pk=self.kwargs['pk']
+        )
+        if not exam.is_enrolled:
+            raise PermissionDenied("You are not enrolled in this course.")
+        serializer.save(student=self.request.user, exam=exam)  # Pass exam here
 
 class ExamAttemptDetailView(generics.RetrieveAPIView):
     serializer_class = ExamAttemptSerializer
@@ -150,49 +179,58 @@ class ExamSubmissionView(generics.CreateAPIView):
     serializer_class = ExamSubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def _get_attempt(self):
+        # Loaded once per request and shared with the serializer via the context. Called
+        # inside create()'s transaction, where the row lock makes concurrent submissions
+        # of the same attempt wait and then see is_completed
+        if not hasattr(self, '_attempt'):
+            self._attempt = get_object_or_404(
+                ExamAttempt.objects.select_for_update(of=('self',))
+                .select_related('exam').defer('exam__description'),
+                pk=self.kwargs['pk']
+            )
+        return self._attempt
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
-        attempt = ExamAttempt.objects.get(id=self.kwargs['pk'])
-        context['attempt'] = attempt
+        context['attempt'] = self._get_attempt()
         return context
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
-        attempt = ExamAttempt.objects.get(id=self.kwargs['pk'])
-        if attempt.student != self.request.user:
+        attempt = self._get_attempt()
+        if attempt.student_id != self.request.user.id:
             return Response({"detail": "You can only submit your own exam attempts."}, status=status.HTTP_403_FORBIDDEN)
         if attempt.is_completed:
             return Response({"detail": "This exam attempt has already been completed."}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        # The serializer saves the same attempt instance, so no refresh is needed
         self.perform_create(serializer)
-        # After saving, return score and other info
-        attempt.refresh_from_db()
         return Response({
             "score": attempt.score,
-            "totalQuestions": attempt.exam.questions.count(),
+            "totalQuestions": attempt.exam.question_count,
             "passingScore": attempt.exam.passing_marks,
             "attemptId": attempt.id
         }, status=status.HTTP_201_CREATED)
 
 class StaffExamListView(generics.ListAPIView):
-    serializer_class = ExamSerializer
+    serializer_class = ExamListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        if self.request.user.user_type != 'teacher':
-            return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
-        return Exam.objects.filter(course__instructor=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            return Exam.objects.none()
+        queryset = Exam.objects.filter(course__instructor=self.request.user)
+        return queryset.only(*ExamListSerializer.Meta.fields).order_by('pk')
 
-class StaffExamDetailView(generics.RetrieveAPIView):
+class StaffExamDetailView(AttachExamRelatedMixin, TeacherOwnedExamMixin, generics.RetrieveAPIView):
     serializer_class = ExamSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_object(self):
-        exam = get_object_or_404(Exam, pk=self.kwargs['pk'])
-        if self.request.user.user_type != 'teacher' or exam.course.instructor != self.request.user:
-            return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
-        return exam
+    def get_exam_queryset(self):
+        return super().get_exam_queryset().select_related('course__instructor')
 
 class StaffExamCreateView(generics.CreateAPIView):
     serializer_class = StaffExamCreateSerializer
@@ -217,44 +255,50 @@ class StaffExamCreateView(generics.CreateAPIView):
         # Save the exam with the course
         serializer.save(course=course)
 
-class StaffExamUpdateView(generics.UpdateAPIView):
-    serializer_class = ExamSerializer
+class StaffExamUpdateView(TeacherOwnedExamMixin, generics.UpdateAPIView):
+    serializer_class = StaffExamCreateSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_object(self):
-        exam = get_object_or_404(Exam, pk=self.kwargs['pk'])
-        if self.request.user.user_type != 'teacher' or exam.course.instructor != self.request.user:
-            return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
-        return exam
-
-class StaffExamDeleteView(generics.DestroyAPIView):
+class StaffExamDeleteView(TeacherOwnedExamMixin, generics.DestroyAPIView):
     serializer_class = ExamSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_object(self):
-        exam = get_object_or_404(Exam, pk=self.kwargs['pk'])
-        if self.request.user.user_type != 'teacher' or exam.course.instructor != self.request.user:
-            return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
-        return exam
+    def get_exam_queryset(self):
+        return super().get_exam_queryset().only('id')
 
-class StaffExamAnalyticsView(APIView):
+class StaffExamAnalyticsView(TeacherOwnedExamMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    cache_timeout = 60 * 5
+
+    def get_exam_queryset(self):
+        # Only passing_marks is read; skip the wide text columns
+        return super().get_exam_queryset().only('id', 'passing_marks')
 
     def get(self, request, pk):
-        exam = get_object_or_404(Exam, pk=pk)
-        if request.user.user_type != 'teacher' or exam.course.instructor != request.user:
-            return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
+        exam = self.get_object()
 
-        attempts = ExamAttempt.objects.filter(exam=exam)
-        total_attempts = attempts.count()
-        completed_attempts = attempts.filter(submitted_at__isnull=False).count()
-        average_score = attempts.filter(submitted_at__isnull=False).aggregate(
-            avg_score=Avg('score')
-        )['avg_score'] or 0
+        key = exam_analytics_cache_key(exam.pk)
+        payload = cache.get(key)
+        if payload is None:
+            # Completed attempts are flagged with is_completed (there is no submitted_at column).
+            # Counting the non-null exam column keeps every referenced column inside
+            # ea_exam_completed_score_idx, allowing an index-only scan.
+            stats = ExamAttempt.objects.filter(exam=exam).aggregate(
+                total_attempts=Count('exam'),
+                completed_attempts=Count('exam', filter=Q(is_completed=True)),
+                average_score=Avg('score', filter=Q(is_completed=True)),
+                passed_attempts=Count('exam', filter=Q(score__gte=exam.passing_marks)),
+            )
+            completed_attempts = stats['completed_attempts']
+            payload = {
+                'total_attempts': stats['total_attempts'],
+                'completed_attempts': completed_attempts,
+                'average_score': stats['average_score'] or 0,
+                'passing_rate': (stats['passed_attempts'] / completed_attempts * 100) if completed_attempts > 0 else 0
+            }
+            # exams.signals clears the key when an attempt or the exam changes, but only in the
+            # cache backend the writing process sees: with the default LocMemCache, other
+            # workers keep serving their copy until cache_timeout expires
+            cache.set(key, payload, self.cache_timeout)
 
-        return Response({
-            'total_attempts': total_attempts,
-            'completed_attempts': completed_attempts,
-            'average_score': average_score,
-            'passing_rate': (attempts.filter(score__gte=exam.passing_marks).count() / completed_attempts * 100) if completed_attempts > 0 else 0
-        })
+        return Response(payload)
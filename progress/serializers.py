@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from .models import CourseProgress, LessonProgress, ExamProgress
 from courses.serializers import CourseSerializer, LessonSerializer
-from exams.serializers import ExamSerializer
+from exams.serializers import ExamSerializer, attach_exam_related
 from django.db import models
 
 class LessonProgressSerializer(serializers.ModelSerializer):
@@ -56,4 +56,4 @@ class CourseProgressOverviewSerializer(serializers.ModelSerializer):
             start_time__gt=timezone.now(),
             is_published=True
         ).order_by('start_time')[:5]
-        return ExamSerializer(upcoming_exams, many=True).data 
\ No newline at end of file
+        return ExamSerializer(attach_exam_related(list(upcoming_exams)), many=True).data 
\ No newline at end of file
@@ -9,6 +9,7 @@ from .serializers import (
 )
 from django.db import models
 from rest_framework.exceptions import PermissionDenied
+from exams.serializers import attach_exam_related, exam_related_lookups
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.db.models import Count, Avg, Max
@@ -111,6 +112,7 @@ class ExamProgressView(generics.RetrieveAPIView):
             student=self.request.user,
             exam_id=exam_id
         )
+        attach_exam_related([progress.exam])
         return progress
 
 class CourseProgressOverviewView(generics.RetrieveAPIView):
@@ -204,7 +206,9 @@ class ExamProgressListView(generics.ListAPIView):
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return ExamProgress.objects.none()
-        return ExamProgress.objects.filter(student=self.request.user)
+        return ExamProgress.objects.filter(student=self.request.user).select_related(
+            'exam__course__instructor'
+        ).prefetch_related(*exam_related_lookups('exam__'))
 
 class ExamProgressDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = ExamProgressSerializer
@@ -213,7 +217,9 @@ class ExamProgressDetailView(generics.RetrieveUpdateAPIView):
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return ExamProgress.objects.none()
-        return ExamProgress.objects.filter(student=self.request.user)
+        return ExamProgress.objects.filter(student=self.request.user).select_related(
+            'exam__course__instructor'
+        ).prefetch_related(*exam_related_lookups('exam__'))
 
 class LearningJourneyStatsView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]